@@ -29,6 +29,7 @@ MIDDLEWARE = [
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'movies.middleware.PrimaryPinningMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -67,6 +68,38 @@ DATABASES = {
     }
 }
 
+# Read replicas as comma separated host[:port][/db_name], for example
+# DB_REPLICAS=10.0.0.2,10.0.0.3:5433/movies_replica
+DATABASE_REPLICAS = []
+# Seconds to wait for a replica, an unreachable one is skipped after that
+DATABASE_REPLICA_CONNECT_TIMEOUT = int(
+    os.environ.get('DB_REPLICA_CONNECT_TIMEOUT', 2))
+for number, replica in enumerate(
+        filter(None, os.environ.get('DB_REPLICAS', '').split(',')), start=1):
+    address, _, name = replica.strip().partition('/')
+    host, _, port = address.partition(':')
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': host,
+        'PORT': port or DATABASES['default']['PORT'],
+        'NAME': name or DATABASES['default']['NAME'],
+        'OPTIONS': {
+            **DATABASES['default']['OPTIONS'],
+            'connect_timeout': DATABASE_REPLICA_CONNECT_TIMEOUT,
+        },
+    }
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_REPLICA_RETRY_SECONDS = int(
+    os.environ.get('DB_REPLICA_RETRY_SECONDS', 30))
+
+DATABASE_ROUTERS = ['movies.routers.ReplicaRouter']
+
+# Number of hash partitions by film_work_id for genre_film_work and
+# person_film_work, 0 keeps the link tables plain
+DATABASE_LINK_PARTITIONS = int(os.environ.get('DB_LINK_PARTITIONS', 0))
+
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -97,4 +130,25 @@ USE_TZ = True
 
 STATIC_URL = '/static/'
 
+MEDIA_URL = '/media/'
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT') or BASE_DIR.parent / 'media'
+
+# Uploads bigger than FILE_UPLOAD_MAX_MEMORY_SIZE are streamed to disk
+# and hashed chunk by chunk for the content addressed storage
+FILE_UPLOAD_HANDLERS = [
+    'django.core.files.uploadhandler.MemoryFileUploadHandler',
+    'movies.uploads.HashingTemporaryFileUploadHandler',
+]
+
+# Parts of resumable uploads, next to MEDIA_ROOT so that they are not
+# served as media but finished uploads are still moved instead of copied
+CHUNKED_UPLOAD_DIR = os.environ.get('CHUNKED_UPLOAD_DIR') or (
+    Path(MEDIA_ROOT).parent / 'uploads')
+# Bigger chunks are rejected, so that one request does not hold a worker
+# for the whole file
+CHUNKED_UPLOAD_MAX_CHUNK_SIZE = int(
+    os.environ.get('CHUNKED_UPLOAD_MAX_CHUNK_SIZE', 64 * 1024 * 1024))
+
+FILE_UPLOAD_WORKERS = int(os.environ.get('FILE_UPLOAD_WORKERS', 2))
+
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
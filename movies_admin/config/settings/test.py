@@ -0,0 +1,18 @@
+from .base import *
+
+# Two local Postgres databases stand in for read replicas, the test runner
+# creates test_<name> for each of them
+for alias in DATABASE_REPLICAS:
+    del DATABASES[alias]
+DATABASE_REPLICAS = []
+for number in (1, 2):
+    alias = f'replica_{number}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'NAME': f"{DATABASES['default']['NAME']}_replica_{number}",
+        'OPTIONS': {
+            **DATABASES['default']['OPTIONS'],
+            'connect_timeout': DATABASE_REPLICA_CONNECT_TIMEOUT,
+        },
+    }
+    DATABASE_REPLICAS.append(alias)
@@ -1,5 +1,13 @@
 from django.contrib import admin
+from django.conf import settings
+from django.core.exceptions import PermissionDenied, ValidationError
+from django.http import (Http404, HttpResponse, HttpResponseBadRequest,
+                         HttpResponseNotAllowed, JsonResponse)
+from django.urls import path
+
 from .models import Genre, Person, FilmWork
+from .uploads import (ChunkedUpload, UploadConflict, schedule_file_metadata,
+                      schedule_finish_upload, validate_upload_name)
 
 
 class PersonInLineAdmin(admin.TabularInline):
@@ -14,12 +22,15 @@ class GenreInLineAdmin(admin.TabularInline):
 
 @admin.register(Genre)
 class GenreAdmin(admin.ModelAdmin):
-    list_display = ('name',)
+    list_display = ('name', 'films_count')
 
 
 @admin.register(Person)
 class PersonAdmin(admin.ModelAdmin):
-    list_display = ('full_name', 'birth_date')
+    list_display = (
+        'full_name', 'birth_date', 'actor_films_count',
+        'writer_films_count', 'director_films_count',
+    )
     fields = ('full_name', 'birth_date')
     inlines = (PersonInLineAdmin,)
     search_fields = ('full_name', 'birth_date')
@@ -30,11 +41,84 @@ class FilmWorkAdmin(admin.ModelAdmin):
     list_display = ('title', 'type', 'creation_date', 'rating')
     fields = (
         'title', 'type', 'description', 'creation_date', 'certificate',
-        'file_path', 'rating',
+        'file_path', 'file_size', 'file_mime_type', 'file_duration', 'rating',
     )
+    readonly_fields = ('file_size', 'file_mime_type', 'file_duration')
     raw_id_fields = ('genres', 'persons')
     inlines = [
         PersonInLineAdmin,
         GenreInLineAdmin,
     ]
     search_fields = ('title', 'description', 'type', 'genres')
+
+    def save_model(self, request, obj, form, change):
+        file_changed = 'file_path' in form.changed_data
+        if file_changed:
+            # Metadata of the previous file, the new one is probed later
+            obj.file_size = obj.file_mime_type = obj.file_duration = None
+        super().save_model(request, obj, form, change)
+        if file_changed and obj.file_path:
+            schedule_file_metadata(obj.pk)
+
+    def get_urls(self):
+        return [
+            path('<path:object_id>/upload/',
+                 self.admin_site.admin_view(self.upload_view),
+                 name='movies_filmwork_upload'),
+        ] + super().get_urls()
+
+    def upload_view(self, request, object_id):
+        """Resumable upload of a big file, sent as raw chunks.
+
+        GET returns the offset to continue from and the status of the
+        upload, POST with ``offset`` appends the request body, ``name``
+        finishes the upload in the background, ``retry`` restarts
+        a failed or lost finishing and DELETE drops the received part.
+        """
+        film_work = self.get_object(request, object_id)
+        if film_work is None:
+            raise Http404
+        if not self.has_change_permission(request, film_work):
+            raise PermissionDenied
+        upload = ChunkedUpload(film_work.pk)
+
+        if request.method == 'GET':
+            return JsonResponse(upload.status)
+        if request.method == 'DELETE':
+            if upload.pending:
+                return JsonResponse(upload.status, status=409)
+            upload.discard()
+            return JsonResponse(upload.status)
+        if request.method != 'POST':
+            return HttpResponseNotAllowed(('GET', 'POST', 'DELETE'))
+
+        if 'retry' in request.GET:
+            if not upload.pending:
+                return JsonResponse(upload.status, status=409)
+            schedule_finish_upload(film_work.pk)
+            return JsonResponse(upload.status, status=202)
+
+        try:
+            offset = int(request.GET.get('offset', 0))
+            chunk_size = int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            return HttpResponseBadRequest(
+                'offset and Content-Length must be integers')
+        if chunk_size > settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE:
+            return HttpResponse(
+                f'Chunk is bigger than '
+                f'{settings.CHUNKED_UPLOAD_MAX_CHUNK_SIZE} bytes', status=413)
+        file_name = request.GET.get('name')
+        if file_name:
+            try:
+                validate_upload_name(file_name)
+            except ValidationError as ex:
+                return HttpResponseBadRequest(' '.join(ex.messages))
+        try:
+            upload.append(request, offset, file_name)
+        except UploadConflict:
+            return JsonResponse(upload.status, status=409)
+        if file_name:
+            schedule_finish_upload(film_work.pk)
+            return JsonResponse(upload.status, status=202)
+        return JsonResponse(upload.status)
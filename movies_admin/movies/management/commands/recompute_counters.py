@@ -0,0 +1,87 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterator, List
+
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, connection, transaction
+from django.db.models import Count, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from movies.models import Genre, GenreFilmWork, Person, PersonFilmWork, RoleType
+
+
+def _count_subquery(queryset, group_field: str, **filters) -> Coalesce:
+    counts = queryset.filter(
+        **{group_field: OuterRef('pk')}, **filters
+    ).order_by().values(group_field).annotate(
+        films=Count('pk')).values('films')
+    return Coalesce(
+        Subquery(counts, output_field=IntegerField()), 0)
+
+
+def _chunks(model, chunk_size: int) -> Iterator[List]:
+    chunk: List = []
+    # Replicas may lag behind, rows missing there would not be recomputed
+    pks = model.objects.using(DEFAULT_DB_ALIAS).order_by('pk').values_list(
+        'pk', flat=True)
+    for pk in pks.iterator(chunk_size=chunk_size):
+        chunk.append(pk)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _lock_links(model) -> None:
+    # SHARE mode waits for running link writes and blocks new ones until
+    # the chunk is committed, so a trigger increment can not be overwritten
+    # by a count taken from an older snapshot
+    with connection.cursor() as cursor:
+        cursor.execute(f'LOCK TABLE {model._meta.db_table} IN SHARE MODE')
+
+
+def _recompute_genres(pks: List) -> int:
+    try:
+        with transaction.atomic():
+            _lock_links(GenreFilmWork)
+            return Genre.objects.filter(pk__in=pks).update(
+                films_count=_count_subquery(
+                    GenreFilmWork.objects, 'genre'))
+    finally:
+        connection.close()
+
+
+def _recompute_persons(pks: List) -> int:
+    try:
+        with transaction.atomic():
+            _lock_links(PersonFilmWork)
+            return Person.objects.filter(pk__in=pks).update(**{
+                f'{role}_films_count': _count_subquery(
+                    PersonFilmWork.objects, 'person', role=role)
+                for role in RoleType.values
+            })
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = 'Recompute films counters for genres and persons'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size', type=int, default=1000,
+            help='Number of rows updated by one statement')
+        parser.add_argument(
+            '--workers', type=int, default=4,
+            help='Number of chunks processed in parallel')
+
+    def handle(self, *args, **options):
+        chunk_size = options['chunk_size']
+        with ThreadPoolExecutor(max_workers=options['workers']) as executor:
+            for model, recompute in ((Genre, _recompute_genres),
+                                     (Person, _recompute_persons)):
+                updated = sum(executor.map(
+                    recompute, _chunks(model, chunk_size)))
+                self.stdout.write(
+                    f'Recomputed counters for {updated} rows '
+                    f'of {model._meta.verbose_name_plural}')
@@ -0,0 +1,23 @@
+from movies.routers import in_request, pinned_to_primary, request_replica
+
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class PrimaryPinningMiddleware:
+    """Keep unsafe requests and reads after a write on the primary,
+    and the other reads of a request on one replica."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request_token = in_request.set(True)
+        pinned_token = pinned_to_primary.set(
+            request.method not in SAFE_METHODS)
+        replica_token = request_replica.set(None)
+        try:
+            return self.get_response(request)
+        finally:
+            request_replica.reset(replica_token)
+            pinned_to_primary.reset(pinned_token)
+            in_request.reset(request_token)
@@ -14,6 +14,9 @@ class Migration(migrations.Migration):
     ]
 
     operations = [
+        migrations.RunSQL(
+            sql='CREATE SCHEMA IF NOT EXISTS content;',
+            reverse_sql=migrations.RunSQL.noop),
         migrations.CreateModel(
             name='FilmWork',
             fields=[
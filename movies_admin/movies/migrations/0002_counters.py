@@ -0,0 +1,157 @@
+from django.db import migrations, models
+
+# Counters are kept up to date by statement-level triggers, so bulk inserts
+# (admin inlines, sqlite_to_postgres loader) cost one UPDATE per statement
+# instead of one per row.
+GENRE_COUNTER_SQL = '''
+ALTER TABLE content.genre ALTER COLUMN films_count SET DEFAULT 0;
+
+UPDATE content.genre g
+SET films_count = d.films
+FROM (SELECT genre_id, count(*) AS films
+      FROM content.genre_film_work GROUP BY genre_id) d
+WHERE g.id = d.genre_id;
+
+CREATE OR REPLACE FUNCTION content.genre_film_work_counters() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE content.genre g
+        SET films_count = g.films_count - d.films
+        FROM (SELECT genre_id, count(*) AS films
+              FROM old_rows GROUP BY genre_id) d
+        WHERE g.id = d.genre_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE content.genre g
+        SET films_count = g.films_count + d.films
+        FROM (SELECT genre_id, count(*) AS films
+              FROM new_rows GROUP BY genre_id) d
+        WHERE g.id = d.genre_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER genre_film_work_counters_insert
+    AFTER INSERT ON content.genre_film_work
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.genre_film_work_counters();
+CREATE TRIGGER genre_film_work_counters_update
+    AFTER UPDATE ON content.genre_film_work
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.genre_film_work_counters();
+CREATE TRIGGER genre_film_work_counters_delete
+    AFTER DELETE ON content.genre_film_work
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.genre_film_work_counters();
+'''
+
+GENRE_COUNTER_REVERSE_SQL = '''
+DROP TRIGGER IF EXISTS genre_film_work_counters_insert ON content.genre_film_work;
+DROP TRIGGER IF EXISTS genre_film_work_counters_update ON content.genre_film_work;
+DROP TRIGGER IF EXISTS genre_film_work_counters_delete ON content.genre_film_work;
+DROP FUNCTION IF EXISTS content.genre_film_work_counters();
+'''
+
+PERSON_COUNTER_SQL = '''
+ALTER TABLE content.person ALTER COLUMN actor_films_count SET DEFAULT 0;
+ALTER TABLE content.person ALTER COLUMN writer_films_count SET DEFAULT 0;
+ALTER TABLE content.person ALTER COLUMN director_films_count SET DEFAULT 0;
+
+UPDATE content.person p
+SET actor_films_count = d.actor,
+    writer_films_count = d.writer,
+    director_films_count = d.director
+FROM (SELECT person_id,
+             count(*) FILTER (WHERE role = 'actor') AS actor,
+             count(*) FILTER (WHERE role = 'writer') AS writer,
+             count(*) FILTER (WHERE role = 'director') AS director
+      FROM content.person_film_work GROUP BY person_id) d
+WHERE p.id = d.person_id;
+
+CREATE OR REPLACE FUNCTION content.person_film_work_counters() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE content.person p
+        SET actor_films_count = p.actor_films_count - d.actor,
+            writer_films_count = p.writer_films_count - d.writer,
+            director_films_count = p.director_films_count - d.director
+        FROM (SELECT person_id,
+                     count(*) FILTER (WHERE role = 'actor') AS actor,
+                     count(*) FILTER (WHERE role = 'writer') AS writer,
+                     count(*) FILTER (WHERE role = 'director') AS director
+              FROM old_rows GROUP BY person_id) d
+        WHERE p.id = d.person_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE content.person p
+        SET actor_films_count = p.actor_films_count + d.actor,
+            writer_films_count = p.writer_films_count + d.writer,
+            director_films_count = p.director_films_count + d.director
+        FROM (SELECT person_id,
+                     count(*) FILTER (WHERE role = 'actor') AS actor,
+                     count(*) FILTER (WHERE role = 'writer') AS writer,
+                     count(*) FILTER (WHERE role = 'director') AS director
+              FROM new_rows GROUP BY person_id) d
+        WHERE p.id = d.person_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER person_film_work_counters_insert
+    AFTER INSERT ON content.person_film_work
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.person_film_work_counters();
+CREATE TRIGGER person_film_work_counters_update
+    AFTER UPDATE ON content.person_film_work
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.person_film_work_counters();
+CREATE TRIGGER person_film_work_counters_delete
+    AFTER DELETE ON content.person_film_work
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.person_film_work_counters();
+'''
+
+PERSON_COUNTER_REVERSE_SQL = '''
+DROP TRIGGER IF EXISTS person_film_work_counters_insert ON content.person_film_work;
+DROP TRIGGER IF EXISTS person_film_work_counters_update ON content.person_film_work;
+DROP TRIGGER IF EXISTS person_film_work_counters_delete ON content.person_film_work;
+DROP FUNCTION IF EXISTS content.person_film_work_counters();
+'''
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='genre',
+            name='films_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='films count'),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='actor_films_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='films as actor'),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='writer_films_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='films as writer'),
+        ),
+        migrations.AddField(
+            model_name='person',
+            name='director_films_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='films as director'),
+        ),
+        migrations.RunSQL(
+            sql=GENRE_COUNTER_SQL,
+            reverse_sql=GENRE_COUNTER_REVERSE_SQL),
+        migrations.RunSQL(
+            sql=PERSON_COUNTER_SQL,
+            reverse_sql=PERSON_COUNTER_REVERSE_SQL),
+    ]
@@ -0,0 +1,102 @@
+from django.conf import settings
+from django.db import migrations
+
+# Link tables are partitioned by hash of film_work_id only when
+# DB_LINK_PARTITIONS is set. Primary and unique keys of a partitioned table
+# have to contain the partition key, so the primary key becomes
+# (id, film_work_id).
+LINK_TABLES = (
+    ('genre_film_work', 'genre', ('film_work_id', 'genre_id')),
+    ('person_film_work', 'person', ('film_work_id', 'person_id', 'role')),
+)
+
+IS_PARTITIONED_SQL = '''
+SELECT EXISTS (
+    SELECT 1 FROM pg_partitioned_table
+    WHERE partrelid = 'content.{table}'::regclass)
+'''
+
+REBUILD_SQL = '''
+ALTER TABLE content.{table} RENAME TO {table}_old;
+CREATE TABLE content.{table}
+    (LIKE content.{table}_old INCLUDING DEFAULTS){partition_by};
+{partitions}
+INSERT INTO content.{table} SELECT * FROM content.{table}_old;
+DROP TABLE content.{table}_old;
+
+ALTER TABLE content.{table}
+    ADD CONSTRAINT {table}_pkey PRIMARY KEY ({primary_key}),
+    ADD CONSTRAINT {table}_unique UNIQUE ({unique}),
+    ADD CONSTRAINT {table}_film_work_id_fk FOREIGN KEY (film_work_id)
+        REFERENCES content.film_work (id)
+        ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED,
+    ADD CONSTRAINT {table}_{related}_id_fk FOREIGN KEY ({related}_id)
+        REFERENCES content.{related} (id)
+        ON DELETE CASCADE DEFERRABLE INITIALLY DEFERRED;
+CREATE INDEX {table}_{related}_id_idx ON content.{table} ({related}_id);
+
+CREATE TRIGGER {table}_counters_insert
+    AFTER INSERT ON content.{table}
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.{table}_counters();
+CREATE TRIGGER {table}_counters_update
+    AFTER UPDATE ON content.{table}
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.{table}_counters();
+CREATE TRIGGER {table}_counters_delete
+    AFTER DELETE ON content.{table}
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.{table}_counters();
+'''
+
+PARTITION_SQL = '''
+CREATE TABLE content.{table}_p{remainder} PARTITION OF content.{table}
+    FOR VALUES WITH (MODULUS {modulus}, REMAINDER {remainder});'''
+
+
+def _is_partitioned(schema_editor, table: str) -> bool:
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(IS_PARTITIONED_SQL.format(table=table))
+        return cursor.fetchone()[0]
+
+
+def _rebuild_link_table(schema_editor, table: str, related: str,
+                        unique: tuple, modulus: int) -> None:
+    partitions = ''.join(
+        PARTITION_SQL.format(
+            table=table, modulus=modulus, remainder=remainder)
+        for remainder in range(modulus))
+    schema_editor.execute(REBUILD_SQL.format(
+        table=table,
+        related=related,
+        partition_by=' PARTITION BY HASH (film_work_id)' if modulus else '',
+        partitions=partitions,
+        primary_key='id, film_work_id' if modulus else 'id',
+        unique=', '.join(unique)))
+
+
+def partition_link_tables(apps, schema_editor):
+    modulus = settings.DATABASE_LINK_PARTITIONS
+    if not modulus:
+        return
+    for table, related, unique in LINK_TABLES:
+        if not _is_partitioned(schema_editor, table):
+            _rebuild_link_table(schema_editor, table, related, unique, modulus)
+
+
+def merge_link_tables(apps, schema_editor):
+    for table, related, unique in LINK_TABLES:
+        if _is_partitioned(schema_editor, table):
+            _rebuild_link_table(schema_editor, table, related, unique, 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0002_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            partition_link_tables, merge_link_tables),
+    ]
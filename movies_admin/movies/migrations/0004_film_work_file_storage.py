@@ -0,0 +1,32 @@
+from django.db import migrations, models
+import movies.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('movies', '0003_partition_link_tables'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='filmwork',
+            name='file_path',
+            field=models.FileField(blank=True, null=True, storage=movies.storage.ContentAddressedStorage(), upload_to='film_works/', verbose_name='file'),
+        ),
+        migrations.AddField(
+            model_name='filmwork',
+            name='file_size',
+            field=models.BigIntegerField(blank=True, editable=False, null=True, verbose_name='file size'),
+        ),
+        migrations.AddField(
+            model_name='filmwork',
+            name='file_mime_type',
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True, verbose_name='file type'),
+        ),
+        migrations.AddField(
+            model_name='filmwork',
+            name='file_duration',
+            field=models.DurationField(blank=True, editable=False, null=True, verbose_name='file duration'),
+        ),
+    ]
@@ -3,6 +3,8 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import MinValueValidator, MaxValueValidator
 
+from movies.storage import ContentAddressedStorage
+
 
 class TimeStampedMixin(models.Model):
     class Meta:
@@ -34,6 +36,8 @@ class Genre(TimeStampedMixin):
         max_length=100)
     description = models.TextField(
         _('description'), blank=True, null=True)
+    films_count = models.PositiveIntegerField(
+        _('films count'), default=0, editable=False)
 
     def __str__(self):
         return self.name
@@ -52,6 +56,12 @@ class Person(TimeStampedMixin):
         _('full_name'), max_length=200)
     birth_date = models.DateField(
         _('birth_date'), blank=True, null=True)
+    actor_films_count = models.PositiveIntegerField(
+        _('films as actor'), default=0, editable=False)
+    writer_films_count = models.PositiveIntegerField(
+        _('films as writer'), default=0, editable=False)
+    director_films_count = models.PositiveIntegerField(
+        _('films as director'), default=0, editable=False)
 
     def __str__(self):
         return self.full_name
@@ -77,7 +87,15 @@ class FilmWork(TimeStampedMixin):
         _('certificate'), blank=True, null=True)
     file_path = models.FileField(
         _('file'), upload_to='film_works/',
+        storage=ContentAddressedStorage(),
         blank=True, null=True)
+    file_size = models.BigIntegerField(
+        _('file size'), blank=True, null=True, editable=False)
+    file_mime_type = models.CharField(
+        _('file type'), max_length=100,
+        blank=True, null=True, editable=False)
+    file_duration = models.DurationField(
+        _('file duration'), blank=True, null=True, editable=False)
     rating = models.FloatField(
         _('rating'), validators=[MinValueValidator(0.0), MaxValueValidator(10.0)],
         blank=True, null=True)
@@ -0,0 +1,90 @@
+import itertools
+import logging
+import time
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections
+
+logger = logging.getLogger(__name__)
+
+# Set by PrimaryPinningMiddleware, reads outside requests (management
+# commands, background tasks) stay on the primary.
+in_request: ContextVar[bool] = ContextVar('in_request', default=False)
+# Set once something was written during the current request, so that the
+# following reads see own writes instead of a lagging replica.
+pinned_to_primary: ContextVar[bool] = ContextVar(
+    'pinned_to_primary', default=False)
+# Replica chosen for the current request, so that all its reads (e.g. the
+# COUNT and the rows of a changelist) come from one snapshot.
+request_replica: ContextVar[Optional[str]] = ContextVar(
+    'request_replica', default=None)
+
+_replica_counter = itertools.count()
+_unhealthy_until: Dict[str, float] = {}
+
+
+def _is_healthy(alias: str) -> bool:
+    if time.monotonic() < _unhealthy_until.get(alias, 0):
+        return False
+    replica = connections[alias]
+    try:
+        # A connection opened by an earlier request may have died since
+        if replica.connection is not None and not replica.is_usable():
+            replica.close()
+        replica.ensure_connection()
+    except OperationalError:
+        _unhealthy_until[alias] = (
+            time.monotonic() + settings.DATABASE_REPLICA_RETRY_SECONDS)
+        logger.warning(
+            f'Replica {alias} is unavailable, skipping it for '
+            f'{settings.DATABASE_REPLICA_RETRY_SECONDS} seconds')
+        return False
+    return True
+
+
+def _pick_replica() -> Optional[str]:
+    replicas = settings.DATABASE_REPLICAS
+    start = next(_replica_counter)
+    for shift in range(len(replicas)):
+        alias = replicas[(start + shift) % len(replicas)]
+        if _is_healthy(alias):
+            return alias
+    return None
+
+
+class ReplicaRouter:
+    """Send request reads of movies models to replicas, the rest to primary.
+
+    A replica is checked when it is picked for a request, a replica failing
+    in the middle of a request raises to the caller without failover.
+    """
+
+    app_label = 'movies'
+
+    def db_for_read(self, model, **hints) -> Optional[str]:
+        if model._meta.app_label != self.app_label:
+            return None
+        if (not settings.DATABASE_REPLICAS or not in_request.get()
+                or pinned_to_primary.get()):
+            return DEFAULT_DB_ALIAS
+        alias = request_replica.get()
+        if alias is None or (
+                time.monotonic() < _unhealthy_until.get(alias, 0)):
+            alias = _pick_replica() or DEFAULT_DB_ALIAS
+            request_replica.set(alias)
+        return alias
+
+    def db_for_write(self, model, **hints) -> str:
+        pinned_to_primary.set(True)
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None,
+                      **hints) -> Optional[bool]:
+        if db in settings.DATABASE_REPLICAS:
+            return False
+        return None
@@ -0,0 +1,35 @@
+import hashlib
+import os
+
+from django.core.files.storage import FileSystemStorage
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Store files under the sha256 of their content, keeping one copy."""
+
+    def _hash(self, content) -> str:
+        # HashingTemporaryFileUploadHandler hashes uploads while receiving
+        digest = getattr(content, 'sha256', None)
+        if digest:
+            return digest
+        sha256 = hashlib.sha256()
+        for chunk in content.chunks():
+            sha256.update(chunk)
+        return sha256.hexdigest()
+
+    def hashed_name(self, name: str, digest: str) -> str:
+        directory, file_name = os.path.split(name)
+        return os.path.join(
+            directory, digest[:2], digest[2:4],
+            digest + os.path.splitext(file_name)[1].lower())
+
+    def _save(self, name, content):
+        name = self.hashed_name(name, self._hash(content))
+        if self.exists(name):
+            return name
+        # Write under a temporary name and rename over the hashed one: when
+        # the same content is saved concurrently both renames land on one
+        # name, instead of FileSystemStorage picking "<sha256>_<suffix>"
+        temporary_name = super()._save(f'{name}.tmp', content)
+        os.replace(self.path(temporary_name), self.path(name))
+        return name
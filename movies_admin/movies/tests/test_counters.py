@@ -0,0 +1,82 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+
+from movies.models import (FilmWork, Genre, GenreFilmWork, Person,
+                           PersonFilmWork, RoleType)
+
+
+def create_catalog():
+    drama = Genre.objects.create(name='Drama')
+    comedy = Genre.objects.create(name='Comedy')
+    person = Person.objects.create(full_name='Ridley Scott')
+    films = [FilmWork.objects.create(title=f'Film {number}')
+             for number in range(3)]
+    GenreFilmWork.objects.bulk_create(
+        [GenreFilmWork(film_work=film, genre=drama) for film in films]
+        + [GenreFilmWork(film_work=films[0], genre=comedy)])
+    PersonFilmWork.objects.bulk_create([
+        PersonFilmWork(film_work=films[0], person=person,
+                       role=RoleType.DIRECTOR),
+        PersonFilmWork(film_work=films[0], person=person,
+                       role=RoleType.WRITER),
+        PersonFilmWork(film_work=films[1], person=person,
+                       role=RoleType.DIRECTOR),
+    ])
+    return drama, comedy, person, films
+
+
+class CountersTriggersTest(TestCase):
+    def setUp(self):
+        self.drama, self.comedy, self.person, self.films = create_catalog()
+
+    def assertPersonCounters(self, actor, writer, director):
+        self.person.refresh_from_db()
+        self.assertEqual(
+            (self.person.actor_films_count,
+             self.person.writer_films_count,
+             self.person.director_films_count),
+            (actor, writer, director))
+
+    def test_insert_links(self):
+        self.drama.refresh_from_db()
+        self.comedy.refresh_from_db()
+        self.assertEqual(self.drama.films_count, 3)
+        self.assertEqual(self.comedy.films_count, 1)
+        self.assertPersonCounters(actor=0, writer=1, director=2)
+
+    def test_role_update_moves_count(self):
+        link = PersonFilmWork.objects.get(
+            film_work=self.films[1], person=self.person)
+        link.role = RoleType.ACTOR
+        link.save()
+        self.assertPersonCounters(actor=1, writer=1, director=1)
+
+    def test_film_work_delete_cascades(self):
+        self.films[0].delete()
+        self.drama.refresh_from_db()
+        self.comedy.refresh_from_db()
+        self.assertEqual(self.drama.films_count, 2)
+        self.assertEqual(self.comedy.films_count, 0)
+        self.assertPersonCounters(actor=0, writer=0, director=1)
+
+
+class RecomputeCountersTest(TransactionTestCase):
+    def test_recompute_matches_triggers(self):
+        drama, comedy, person, _ = create_catalog()
+        Genre.objects.update(films_count=7)
+        Person.objects.update(
+            actor_films_count=7, writer_films_count=7, director_films_count=7)
+
+        call_command('recompute_counters', chunk_size=1, workers=2,
+                     stdout=StringIO())
+
+        drama.refresh_from_db()
+        comedy.refresh_from_db()
+        person.refresh_from_db()
+        self.assertEqual((drama.films_count, comedy.films_count), (3, 1))
+        self.assertEqual(
+            (person.actor_films_count, person.writer_films_count,
+             person.director_films_count),
+            (0, 1, 2))
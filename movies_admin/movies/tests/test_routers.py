@@ -0,0 +1,82 @@
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.db import OperationalError, connections
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase
+
+from movies import routers
+from movies.middleware import PrimaryPinningMiddleware
+from movies.models import FilmWork
+from movies.routers import ReplicaRouter
+
+
+@skipUnless(len(settings.DATABASE_REPLICAS) == 2,
+            'Run with --settings=config.settings.test')
+class ReplicaRouterTest(TestCase):
+    databases = {'default', *settings.DATABASE_REPLICAS}
+
+    def setUp(self):
+        self.router = ReplicaRouter()
+        self.factory = RequestFactory()
+        routers._unhealthy_until.clear()
+
+    def request_reads(self, method='get', write=False):
+        reads = []
+
+        def view(request):
+            if write:
+                self.router.db_for_write(FilmWork)
+            reads.append(self.router.db_for_read(FilmWork))
+            reads.append(self.router.db_for_read(FilmWork))
+            return HttpResponse()
+
+        PrimaryPinningMiddleware(view)(
+            getattr(self.factory, method)('/admin/movies/filmwork/'))
+        return reads
+
+    def test_reads_rotate_between_requests(self):
+        first = self.request_reads()
+        second = self.request_reads()
+        self.assertEqual(first[0], first[1])
+        self.assertEqual(second[0], second[1])
+        self.assertEqual(
+            {first[0], second[0]}, set(settings.DATABASE_REPLICAS))
+
+    def test_unreachable_replica_is_skipped(self):
+        healthy, broken = settings.DATABASE_REPLICAS
+        retry = settings.DATABASE_REPLICA_RETRY_SECONDS
+        with mock.patch.object(
+                connections[broken], 'ensure_connection',
+                side_effect=OperationalError) as connect, \
+                mock.patch.object(
+                    routers.time, 'monotonic', return_value=1000.0) as now:
+            reads = [self.request_reads()[0] for _ in range(4)]
+            self.assertEqual(reads, [healthy] * 4)
+            self.assertEqual(connect.call_count, 1)
+
+            now.return_value = 1000.0 + retry - 1
+            self.request_reads()
+            self.request_reads()
+            self.assertEqual(connect.call_count, 1)
+
+            now.return_value = 1000.0 + retry + 1
+            self.request_reads()
+            self.request_reads()
+            self.assertEqual(connect.call_count, 2)
+
+    def test_post_request_reads_primary(self):
+        self.assertEqual(
+            self.request_reads(method='post'), ['default', 'default'])
+
+    def test_reads_after_write_use_primary(self):
+        self.assertEqual(
+            self.request_reads(write=True), ['default', 'default'])
+
+    def test_reads_outside_request_use_primary(self):
+        self.assertEqual(self.router.db_for_read(FilmWork), 'default')
+
+    def test_replicas_are_not_migrated(self):
+        for alias in settings.DATABASE_REPLICAS:
+            self.assertIs(self.router.allow_migrate(alias, 'movies'), False)
+        self.assertIsNone(self.router.allow_migrate('default', 'movies'))
@@ -0,0 +1,157 @@
+import hashlib
+import os
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from movies import uploads
+from movies.models import FilmWork
+from movies.storage import ContentAddressedStorage
+from movies.uploads import HashingTemporaryFileUploadHandler
+
+CONTENT = b'frame' * 1000
+
+
+def handler_upload(content, file_name='movie.mp4'):
+    """Pass content through the upload handler like a form upload."""
+    handler = HashingTemporaryFileUploadHandler()
+    handler.new_file('file_path', file_name, 'video/mp4', len(content))
+    handler.receive_data_chunk(content, 0)
+    return handler.file_complete(len(content))
+
+
+def stored_files(root):
+    return sorted(
+        os.path.relpath(os.path.join(directory, name), root)
+        for directory, _, names in os.walk(root) for name in names)
+
+
+class MediaTestCase(TestCase):
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.media_root = os.path.join(directory, 'media')
+        media_settings = override_settings(
+            MEDIA_ROOT=self.media_root,
+            CHUNKED_UPLOAD_DIR=os.path.join(directory, 'uploads'),
+            DATABASE_REPLICAS=[])
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+
+
+class ContentAddressedStorageTest(MediaTestCase):
+    def test_same_content_is_stored_once(self):
+        storage = ContentAddressedStorage()
+        first = storage.save('film_works/a.mp4', ContentFile(CONTENT))
+        second = storage.save('film_works/b.mp4', ContentFile(CONTENT))
+        # Saved at the same time: both see no stored file yet
+        with mock.patch.object(storage, 'exists', return_value=False):
+            third = storage.save('film_works/c.mp4', ContentFile(CONTENT))
+
+        digest = hashlib.sha256(CONTENT).hexdigest()
+        self.assertEqual(
+            first, f'film_works/{digest[:2]}/{digest[2:4]}/{digest}.mp4')
+        self.assertEqual({first, second, third}, {first})
+        self.assertEqual(stored_files(self.media_root), [first])
+
+    def test_handler_hash_matches_content(self):
+        file = handler_upload(CONTENT)
+        self.assertEqual(file.sha256, hashlib.sha256(CONTENT).hexdigest())
+
+
+class ChunkedUploadViewTest(MediaTestCase):
+    def setUp(self):
+        super().setUp()
+        user = get_user_model().objects.create_superuser(
+            'admin', 'admin@example.com', 'password')
+        self.client.force_login(user)
+        self.film_work = FilmWork.objects.create(title='Alien')
+        self.url = reverse(
+            'admin:movies_filmwork_upload', args=[self.film_work.pk])
+
+    def post_chunk(self, chunk, **params):
+        query = '&'.join(f'{key}={value}' for key, value in params.items())
+        return self.client.post(
+            f'{self.url}?{query}', data=chunk,
+            content_type='application/octet-stream')
+
+    def test_resume_from_returned_offset(self):
+        self.post_chunk(CONTENT[:1000], offset=0)
+        offset = self.client.get(self.url).json()['offset']
+        self.assertEqual(offset, 1000)
+
+        response = self.post_chunk(
+            CONTENT[offset:], offset=offset, name='movie.mp4')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()['status'], 'finishing')
+
+        uploads._store_upload(self.film_work.pk)
+        self.film_work.refresh_from_db()
+        with self.film_work.file_path.open('rb') as stored:
+            self.assertEqual(stored.read(), CONTENT)
+        self.assertEqual(self.client.get(self.url).json(), {
+            'offset': 0, 'status': 'stored',
+            'file': self.film_work.file_path.name})
+
+    def test_wrong_offset_conflicts(self):
+        self.post_chunk(CONTENT[:1000], offset=0)
+        response = self.post_chunk(CONTENT[1000:], offset=500)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['offset'], 1000)
+
+    def test_append_while_finishing_conflicts(self):
+        self.post_chunk(CONTENT, offset=0, name='movie.mp4')
+        response = self.post_chunk(b'more', offset=0)
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.json()['status'], 'finishing')
+        self.assertEqual(self.client.delete(self.url).status_code, 409)
+
+    def test_delete_drops_part(self):
+        self.post_chunk(CONTENT[:1000], offset=0)
+        response = self.client.delete(self.url)
+        self.assertEqual(response.json(), {'offset': 0, 'status': 'receiving'})
+        self.assertEqual(self.post_chunk(CONTENT, offset=0).status_code, 200)
+
+    def test_invalid_requests_are_rejected(self):
+        self.assertEqual(self.post_chunk(b'', offset='x').status_code, 400)
+        for name in ('../movie.mp4', 'dir/movie.mp4', 'movie.' + 'x' * 30):
+            response = self.post_chunk(CONTENT, offset=0, name=name)
+            self.assertEqual(response.status_code, 400, name)
+        self.assertEqual(self.client.get(self.url).json()['offset'], 0)
+        with self.settings(CHUNKED_UPLOAD_MAX_CHUNK_SIZE=10):
+            self.assertEqual(
+                self.post_chunk(CONTENT, offset=0).status_code, 413)
+
+    def test_retry_after_database_failure(self):
+        self.post_chunk(CONTENT, offset=0, name='movie.mp4')
+        with mock.patch.object(
+                uploads.ChunkedUpload, 'mark_stored',
+                side_effect=OSError('disk full')):
+            with self.assertRaises(OSError):
+                uploads._store_upload(self.film_work.pk)
+        self.assertEqual(
+            self.client.get(self.url).json()['status'], 'finishing')
+
+        uploads._store_upload(self.film_work.pk)
+        self.film_work.refresh_from_db()
+        self.assertTrue(self.film_work.file_path.name.endswith('.mp4'))
+        self.assertEqual(
+            self.client.get(self.url).json()['status'], 'stored')
+
+    def test_form_and_chunked_uploads_share_file(self):
+        form_film = FilmWork.objects.create(title='Aliens')
+        form_film.file_path.save('movie.mp4', handler_upload(CONTENT))
+
+        self.post_chunk(CONTENT, offset=0, name='other.MP4')
+        uploads._store_upload(self.film_work.pk)
+        self.film_work.refresh_from_db()
+
+        self.assertEqual(
+            self.film_work.file_path.name, form_film.file_path.name)
+        self.assertEqual(
+            stored_files(self.media_root), [form_film.file_path.name])
@@ -0,0 +1,288 @@
+import fcntl
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from typing import Dict, Iterator, Optional
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation, ValidationError
+from django.core.files import File
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import connection, transaction
+
+from movies.models import FilmWork
+from movies.routers import pinned_to_primary
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 1024 * 1024
+STORE_ATTEMPTS = 3
+STORE_RETRY_DELAY = 5
+
+# Hashing, moving and probing of big files happens here instead of
+# a request worker
+_executor = ThreadPoolExecutor(
+    max_workers=settings.FILE_UPLOAD_WORKERS,
+    thread_name_prefix='movies-uploads')
+
+
+class HashingTemporaryFileUploadHandler(TemporaryFileUploadHandler):
+    """Stream uploads to a temporary file, hashing chunks on the way."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.sha256 = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.sha256 = self.sha256.hexdigest()
+        return file
+
+
+def validate_upload_name(file_name: str) -> None:
+    """Reject names that FilmWork.file_path can not store."""
+    if os.path.basename(file_name) != file_name:
+        raise ValidationError('File name must not contain a path')
+    field = FilmWork._meta.get_field('file_path')
+    try:
+        name = field.generate_filename(None, file_name)
+    except SuspiciousFileOperation as ex:
+        raise ValidationError(str(ex))
+    if len(field.storage.hashed_name(name, '0' * 64)) > field.max_length:
+        raise ValidationError('File extension is too long')
+
+
+class UploadedPart(File):
+    """Finished chunked upload, moved into storage instead of copied."""
+
+    def temporary_file_path(self) -> str:
+        return self.file.name
+
+
+class UploadConflict(Exception):
+    """Chunk does not continue the part, or the upload is being finished."""
+
+
+def _is_same_file(file, path: str) -> bool:
+    try:
+        return os.stat(path).st_ino == os.fstat(file.fileno()).st_ino
+    except FileNotFoundError:
+        return False
+
+
+class ChunkedUpload:
+    """Resumable upload of a film work file, received in chunks.
+
+    Chunks are appended to ``<id>.part``. The last chunk renames it to
+    ``<id>.finishing``, which a background task moves into storage;
+    ``<id>.json`` keeps the status of that task for the client and
+    the stored name until it is written to the database.
+    """
+
+    def __init__(self, film_work_id) -> None:
+        base = os.path.join(settings.CHUNKED_UPLOAD_DIR, str(film_work_id))
+        self.path = f'{base}.part'
+        self.finishing_path = f'{base}.finishing'
+        self.state_path = f'{base}.json'
+
+    @property
+    def offset(self) -> int:
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    @property
+    def finishing(self) -> bool:
+        return os.path.exists(self.finishing_path)
+
+    @property
+    def state(self) -> Dict[str, str]:
+        try:
+            with open(self.state_path) as state:
+                return json.load(state)
+        except FileNotFoundError:
+            return {}
+
+    @property
+    def pending(self) -> bool:
+        """Finishing was requested and is not done yet."""
+        state = self.state
+        return self.finishing or (
+            'file' in state and state.get('status') != 'stored')
+
+    @property
+    def status(self) -> Dict:
+        state = self.state
+        if self.finishing or 'file' in state:
+            return {'offset': self.offset, **state}
+        return {'offset': self.offset, 'status': 'receiving'}
+
+    def _write_state(self, **state) -> None:
+        descriptor, path = tempfile.mkstemp(dir=settings.CHUNKED_UPLOAD_DIR)
+        with os.fdopen(descriptor, 'w') as state_file:
+            json.dump(state, state_file)
+        os.replace(path, self.state_path)
+
+    def _remove(self, path: str) -> None:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def _locked_part(self) -> Iterator:
+        if self.pending:
+            raise UploadConflict
+        os.makedirs(settings.CHUNKED_UPLOAD_DIR, exist_ok=True)
+        with open(self.path, 'ab') as part:
+            fcntl.flock(part, fcntl.LOCK_EX)
+            # The part could be renamed for finishing while we waited
+            if self.pending or not _is_same_file(part, self.path):
+                raise UploadConflict
+            yield part
+
+    def append(self, stream, offset: int,
+               file_name: Optional[str] = None) -> int:
+        """Append the stream at ``offset``, finishing when named."""
+        with self._locked_part() as part:
+            size = os.fstat(part.fileno()).st_size
+            if offset != size:
+                raise UploadConflict
+            if size == 0:
+                self._remove(self.state_path)
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b''):
+                part.write(chunk)
+            part.flush()
+            size = os.fstat(part.fileno()).st_size
+            if file_name:
+                self._write_state(status='finishing', name=file_name)
+                os.rename(self.path, self.finishing_path)
+        return size
+
+    @contextmanager
+    def finished_part(self) -> Iterator[Optional[File]]:
+        """Lock the finished part, None if another task already took it."""
+        try:
+            part = open(self.finishing_path, 'rb')
+        except FileNotFoundError:
+            yield None
+            return
+        with part:
+            fcntl.flock(part, fcntl.LOCK_EX)
+            if not _is_same_file(part, self.finishing_path):
+                yield None
+                return
+            yield UploadedPart(part, name=self.state['name'])
+
+    def mark_saved(self, name: str) -> None:
+        self._write_state(**{**self.state, 'file': name})
+        # The part is left behind when the same content is already stored
+        self._remove(self.finishing_path)
+
+    def mark_stored(self) -> None:
+        self._write_state(status='stored', file=self.state['file'])
+
+    def mark_failed(self, error: str) -> None:
+        self._write_state(
+            **{**self.state, 'status': 'failed', 'error': error})
+
+    def discard(self) -> None:
+        self._remove(self.path)
+
+
+def _probe_duration(path: str) -> Optional[timedelta]:
+    ffprobe = shutil.which('ffprobe')
+    if ffprobe is None:
+        return None
+    try:
+        result = subprocess.run(
+            [ffprobe, '-v', 'error', '-show_entries', 'format=duration',
+             '-of', 'default=noprint_wrappers=1:nokey=1', path],
+            capture_output=True, text=True, check=True, timeout=60)
+        return timedelta(seconds=float(result.stdout))
+    except (subprocess.SubprocessError, ValueError) as ex:
+        logger.warning(f'Can not get duration of {path}: {ex}')
+        return None
+
+
+def _collect_file_metadata(film_work_id) -> None:
+    film_work = FilmWork.objects.get(pk=film_work_id)
+    if not film_work.file_path:
+        return
+    storage = film_work.file_path.storage
+    name = film_work.file_path.name
+    FilmWork.objects.filter(pk=film_work_id, file_path=name).update(
+        file_size=storage.size(name),
+        file_mime_type=mimetypes.guess_type(name)[0],
+        file_duration=_probe_duration(storage.path(name)))
+
+
+def _store_upload(film_work_id) -> None:
+    upload = ChunkedUpload(film_work_id)
+    with upload.finished_part() as part:
+        if part is not None:
+            film_work = FilmWork.objects.get(pk=film_work_id)
+            film_work.file_path.save(part.name, part, save=False)
+            # Recorded before the database update, so that a retry finds
+            # the stored name once the part has been moved away
+            upload.mark_saved(film_work.file_path.name)
+    state = upload.state
+    if 'file' not in state or state.get('status') == 'stored':
+        return
+    FilmWork.objects.filter(pk=film_work_id).update(
+        file_path=state['file'], file_size=None,
+        file_mime_type=None, file_duration=None)
+    upload.mark_stored()
+
+
+def _run(task, film_work_id, attempts: int = 1) -> Optional[Exception]:
+    pinned_to_primary.set(True)
+    error = None
+    try:
+        for attempt in range(1, attempts + 1):
+            try:
+                task(film_work_id)
+                return None
+            except Exception as ex:
+                error = ex
+                logger.exception(
+                    f'Attempt {attempt} of {task.__name__}({film_work_id}) '
+                    'failed')
+                connection.close()
+                if attempt < attempts:
+                    time.sleep(STORE_RETRY_DELAY * attempt)
+        return error
+    finally:
+        connection.close()
+
+
+def _finish_upload(film_work_id) -> None:
+    error = _run(_store_upload, film_work_id, attempts=STORE_ATTEMPTS)
+    if error is not None:
+        ChunkedUpload(film_work_id).mark_failed(str(error))
+        return
+    _run(_collect_file_metadata, film_work_id)
+
+
+def schedule_file_metadata(film_work_id) -> None:
+    transaction.on_commit(
+        lambda: _executor.submit(_run, _collect_file_metadata, film_work_id))
+
+
+def schedule_finish_upload(film_work_id) -> None:
+    transaction.on_commit(
+        lambda: _executor.submit(_finish_upload, film_work_id))
@@ -7,16 +7,19 @@ CREATE SCHEMA IF NOT EXISTS content;
 -- Create tables
 CREATE TABLE IF NOT EXISTS content.film_work
 (
-    id            uuid,
-    title         character varying(250) NOT NULL,
-    description   text,
-    creation_date date,
-    certificate   text,
-    file_path     text,
-    rating        real,
-    type          character varying(30)  NOT NULL,
-    created_at    timestamp with time zone,
-    updated_at    timestamp with time zone,
+    id             uuid,
+    title          character varying(250) NOT NULL,
+    description    text,
+    creation_date  date,
+    certificate    text,
+    file_path      text,
+    file_size      bigint,
+    file_mime_type character varying(100),
+    file_duration  interval,
+    rating         real,
+    type           character varying(30)  NOT NULL,
+    created_at     timestamp with time zone,
+    updated_at     timestamp with time zone,
     PRIMARY KEY (id)
 );
 
@@ -25,6 +28,7 @@ CREATE TABLE IF NOT EXISTS content.genre
     id          uuid,
     name        character varying(100) NOT NULL UNIQUE,
     description text,
+    films_count integer NOT NULL DEFAULT 0 CHECK (films_count >= 0),
     created_at  timestamp with time zone,
     updated_at  timestamp with time zone,
     PRIMARY KEY (id)
@@ -35,6 +39,9 @@ CREATE TABLE IF NOT EXISTS content.person
     id         uuid,
     full_name  character varying(200) NOT NULL,
     birth_date date,
+    actor_films_count    integer NOT NULL DEFAULT 0 CHECK (actor_films_count >= 0),
+    writer_films_count   integer NOT NULL DEFAULT 0 CHECK (writer_films_count >= 0),
+    director_films_count integer NOT NULL DEFAULT 0 CHECK (director_films_count >= 0),
     created_at timestamp with time zone,
     updated_at timestamp with time zone,
     PRIMARY KEY (id)
@@ -46,7 +53,7 @@ CREATE TABLE IF NOT EXISTS content.genre_film_work
     film_work_id uuid NOT NULL,
     genre_id uuid NOT NULL,
     created_at timestamp without time zone,
-    PRIMARY KEY (id),
+    PRIMARY KEY (id, film_work_id),
     UNIQUE (film_work_id, genre_id),
     CONSTRAINT "Filmwork" FOREIGN KEY (film_work_id)
         REFERENCES content.film_work (id) MATCH SIMPLE
@@ -56,7 +63,7 @@ CREATE TABLE IF NOT EXISTS content.genre_film_work
         REFERENCES content.genre (id) MATCH SIMPLE
         ON UPDATE CASCADE
         ON DELETE CASCADE
-);
+) PARTITION BY HASH (film_work_id);
 
 CREATE TABLE IF NOT EXISTS content.person_film_work
 (
@@ -65,12 +72,111 @@ CREATE TABLE IF NOT EXISTS content.person_film_work
     film_work_id uuid NOT NULL,
     person_id uuid NOT NULL,
     created_at timestamp with time zone,
-    PRIMARY KEY (id),
+    PRIMARY KEY (id, film_work_id),
     CONSTRAINT "Filmwork" FOREIGN KEY (film_work_id)
         REFERENCES content.film_work (id) MATCH SIMPLE
         ON UPDATE CASCADE
         ON DELETE CASCADE
-);
+) PARTITION BY HASH (film_work_id);
+
+-- Create partitions of link tables, so that rows of one film live in one partition
+DO $$
+DECLARE
+    modulus CONSTANT integer := 8;
+BEGIN
+    FOR remainder IN 0..modulus - 1 LOOP
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS content.genre_film_work_p%s '
+            'PARTITION OF content.genre_film_work '
+            'FOR VALUES WITH (MODULUS %s, REMAINDER %s)',
+            remainder, modulus, remainder);
+        EXECUTE format(
+            'CREATE TABLE IF NOT EXISTS content.person_film_work_p%s '
+            'PARTITION OF content.person_film_work '
+            'FOR VALUES WITH (MODULUS %s, REMAINDER %s)',
+            remainder, modulus, remainder);
+    END LOOP;
+END;
+$$;
 
 -- Create index
-CREATE UNIQUE INDEX film_work_person_role ON content.person_film_work (film_work_id, person_id, role);
\ No newline at end of file
+CREATE INDEX genre_film_work_genre_id_idx ON content.genre_film_work (genre_id);
+CREATE INDEX person_film_work_person_id_idx ON content.person_film_work (person_id);
+CREATE UNIQUE INDEX film_work_person_role ON content.person_film_work (film_work_id, person_id, role);
+
+-- Keep precomputed films counters of genres and persons in sync
+CREATE OR REPLACE FUNCTION content.genre_film_work_counters() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE content.genre g
+        SET films_count = g.films_count - d.films
+        FROM (SELECT genre_id, count(*) AS films
+              FROM old_rows GROUP BY genre_id) d
+        WHERE g.id = d.genre_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE content.genre g
+        SET films_count = g.films_count + d.films
+        FROM (SELECT genre_id, count(*) AS films
+              FROM new_rows GROUP BY genre_id) d
+        WHERE g.id = d.genre_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER genre_film_work_counters_insert
+    AFTER INSERT ON content.genre_film_work
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.genre_film_work_counters();
+CREATE TRIGGER genre_film_work_counters_update
+    AFTER UPDATE ON content.genre_film_work
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.genre_film_work_counters();
+CREATE TRIGGER genre_film_work_counters_delete
+    AFTER DELETE ON content.genre_film_work
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.genre_film_work_counters();
+
+CREATE OR REPLACE FUNCTION content.person_film_work_counters() RETURNS trigger AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE content.person p
+        SET actor_films_count = p.actor_films_count - d.actor,
+            writer_films_count = p.writer_films_count - d.writer,
+            director_films_count = p.director_films_count - d.director
+        FROM (SELECT person_id,
+                     count(*) FILTER (WHERE role = 'actor') AS actor,
+                     count(*) FILTER (WHERE role = 'writer') AS writer,
+                     count(*) FILTER (WHERE role = 'director') AS director
+              FROM old_rows GROUP BY person_id) d
+        WHERE p.id = d.person_id;
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        UPDATE content.person p
+        SET actor_films_count = p.actor_films_count + d.actor,
+            writer_films_count = p.writer_films_count + d.writer,
+            director_films_count = p.director_films_count + d.director
+        FROM (SELECT person_id,
+                     count(*) FILTER (WHERE role = 'actor') AS actor,
+                     count(*) FILTER (WHERE role = 'writer') AS writer,
+                     count(*) FILTER (WHERE role = 'director') AS director
+              FROM new_rows GROUP BY person_id) d
+        WHERE p.id = d.person_id;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER person_film_work_counters_insert
+    AFTER INSERT ON content.person_film_work
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.person_film_work_counters();
+CREATE TRIGGER person_film_work_counters_update
+    AFTER UPDATE ON content.person_film_work
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.person_film_work_counters();
+CREATE TRIGGER person_film_work_counters_delete
+    AFTER DELETE ON content.person_film_work
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT EXECUTE FUNCTION content.person_film_work_counters();
\ No newline at end of file
@@ -1,10 +1,11 @@
 import logging
 import os
+import re
 import sqlite3
-from collections import OrderedDict
+from collections import OrderedDict, defaultdict
 from dataclasses import dataclass
 from os import environ
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 import psycopg2
 from dacite import from_dict
@@ -70,6 +71,74 @@ class PostgresSaver:
         self.schema = schema
         self.page_size = page_size
 
+    def _get_hash_partitioning(self,
+                               table_name: str
+                               ) -> Optional[Tuple[str, str, int]]:
+        table = f'{self.schema}.{table_name}'
+        self.cursor.execute(
+            '''SELECT p.partstrat, p.partnatts, a.attname,
+                      format_type(a.atttypid, a.atttypmod)
+               FROM pg_partitioned_table p
+               LEFT JOIN pg_attribute a
+                   ON a.attrelid = p.partrelid AND a.attnum = p.partattrs[0]
+               WHERE p.partrelid = %s::regclass''',
+            (table,))
+        partitioning = self.cursor.fetchone()
+        if partitioning is None:
+            return None
+        strategy, keys_number, key, key_type = partitioning
+        if strategy != 'h' or keys_number != 1 or key is None:
+            logger.info(
+                f'Table:{table_name} is not hash partitioned by one column, '
+                'rows are not split into partitions')
+            return None
+
+        # Hash partitions are all bound as "FOR VALUES WITH (modulus M,
+        # remainder R)". Smaller moduli divide the greatest one, so rows
+        # grouped by the greatest modulus still fall into one partition.
+        self.cursor.execute(
+            '''SELECT pg_get_expr(c.relpartbound, c.oid)
+               FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+               WHERE i.inhparent = %s::regclass''',
+            (table,))
+        moduli = [
+            int(re.search(r'modulus (\d+)', bound[0]).group(1))
+            for bound in self.cursor.fetchall()]
+        if not moduli:
+            return None
+        return key, key_type, max(moduli)
+
+    def _split_by_partitions(self, table_name: str,
+                             partitioning: Optional[Tuple[str, str, int]],
+                             dataclass_fields: Tuple[str],
+                             rows: List[tuple]) -> List[List[tuple]]:
+        if partitioning is None:
+            return [rows]
+        key, key_type, modulus = partitioning
+        if key not in dataclass_fields:
+            return [rows]
+        key_index = dataclass_fields.index(key)
+        # Keys are returned as sent, not in the canonical text of key_type
+        self.cursor.execute(
+            f'''SELECT key, remainder
+               FROM unnest(%(keys)s::text[]) AS key,
+                    generate_series(0, %(modulus)s - 1) AS remainder
+               WHERE satisfies_hash_partition(
+                   %(table)s::regclass, %(modulus)s, remainder,
+                   key::{key_type})''',
+            {'keys': list({row[key_index] for row in rows}),
+             'modulus': modulus,
+             'table': f'{self.schema}.{table_name}'})
+        remainder_per_key: Dict[str, int] = dict(self.cursor.fetchall())
+
+        partitions: Dict[int, List[tuple]] = defaultdict(list)
+        for row in rows:
+            partitions[remainder_per_key[row[key_index]]].append(row)
+        logger.info(
+            f'Rows for table:{table_name} split into '
+            f'{len(partitions)} of {modulus} partitions')
+        return list(partitions.values())
+
     def _save_data_to_table(self, table_name: str,
                             table_data: List[dataclass]) -> None:
         dataclass_fields: Tuple[str] = tuple(
@@ -84,13 +153,21 @@ class PostgresSaver:
                                                                       field_name) else None)
             rows_for_script.append(tuple(row))
 
-        execute_values(
-            cur=self.cursor,
-            sql=f'''INSERT INTO {self.schema}.{table_name} ({rows_names}) 
-                VALUES %s 
-                ON CONFLICT (id) DO NOTHING''',
-            argslist=rows_for_script,
-            page_size=self.page_size)
+        # Each batch belongs to one partition of a partitioned table,
+        # so an insert statement touches only one partition and its indexes.
+        # Unique keys of a partitioned table include the partition key,
+        # so there (id) alone can not be the conflict target.
+        partitioning = self._get_hash_partitioning(table_name)
+        conflict_target = '' if partitioning else '(id) '
+        for partition_rows in self._split_by_partitions(
+                table_name, partitioning, dataclass_fields, rows_for_script):
+            execute_values(
+                cur=self.cursor,
+                sql=f'''INSERT INTO {self.schema}.{table_name} ({rows_names}) 
+                    VALUES %s 
+                    ON CONFLICT {conflict_target}DO NOTHING''',
+                argslist=partition_rows,
+                page_size=self.page_size)
         table_size = len(table_data)
         logger.info(
             f'Uploaded {table_size} rows for table:{table_name}')